@@ -5,11 +5,10 @@ Follows SOLID principles for clean and extensible code.
 """
 
 import os
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Generator
-import json
-import requests
-import google.generativeai as genai
+import json_codec
 from tabla_isr_constants import get_tabla_isr
 from dotenv import load_dotenv
 
@@ -241,6 +240,9 @@ class GeminiRecommendationGenerator(RecommendationGenerator):
             )
 
         try:
+            # Imported lazily: the SDK pulls in grpc/protobuf and is only needed for Gemini
+            import google.generativeai as genai
+
             genai.configure(api_key=self.api_key)
             self.model = genai.GenerativeModel("gemini-2.5-pro")
         except Exception:
@@ -280,11 +282,10 @@ class GeminiRecommendationGenerator(RecommendationGenerator):
         try:
             response = self.model.generate_content(prompt, stream=True)
 
-            accumulated_text = ""
             for chunk in response:
-                if chunk.text:
-                    accumulated_text += chunk.text
-                    yield chunk.text
+                text = chunk.text
+                if text:
+                    yield text
 
         except Exception as e:
             raise RuntimeError(f"Error generating recommendations with Gemini: {e}")
@@ -449,6 +450,8 @@ class DeepSeekRecommendationGenerator(RecommendationGenerator):
     def generate_recommendations_stream(
         self, calculation_result: Any, user_data: Dict[str, Any], fiscal_year: int
     ) -> Generator[str, None, None]:
+        import requests
+
         url = f"{self.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -475,16 +478,17 @@ class DeepSeekRecommendationGenerator(RecommendationGenerator):
                         err = {"text": resp.text}
                     raise RuntimeError(f"DeepSeek API error {resp.status_code}: {err}")
 
-                for line in resp.iter_lines(decode_unicode=True):
+                # Raw bytes go straight to the JSON parser without a str decode
+                for line in resp.iter_lines():
                     if not line:
                         continue
                     # Some servers prefix with 'data: '
-                    if line.startswith("data: "):
+                    if line.startswith(b"data: "):
                         line = line[6:]
-                    if line.strip() == "[DONE]":
+                    if line.strip() == b"[DONE]":
                         break
                     try:
-                        data = json.loads(line)
+                        data = json_codec.loads(line)
                     except Exception:
                         # ignore malformed lines
                         continue
@@ -558,6 +562,9 @@ class RecommendationFactory:
     Principles: Factory Pattern and Single Responsibility Principle (SRP).
     """
 
+    _shared_service: RecommendationService | None = None
+    _shared_lock = threading.Lock()
+
     @staticmethod
     def create_service(
         use_ai: bool = True, api_key: str | None = None
@@ -594,3 +601,22 @@ class RecommendationFactory:
                 print("🔄 Using only default recommendations...")
 
         return RecommendationService(fallback_generator, fallback_generator)
+
+    @classmethod
+    def get_shared(cls) -> RecommendationService:
+        """Returns a process-wide AI-backed service, configured on first success."""
+        if cls._shared_service is not None:
+            return cls._shared_service
+
+        with cls._shared_lock:
+            if cls._shared_service is not None:
+                return cls._shared_service
+
+            service = cls.create_service(use_ai=True)
+            # Only an AI-backed service is kept; a failed (possibly transient)
+            # provider setup serves defaults now and is retried on the next request
+            if not isinstance(
+                service.primary_generator, FallbackRecommendationGenerator
+            ):
+                cls._shared_service = service
+            return service
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+google-auth transport that honors Cache-Control on certificate fetches.
+Google's signing-key endpoints send a max-age, so ID token verification
+can reuse the keys until they rotate instead of refetching them per login.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import google.auth.transport.requests as google_requests
+from google.auth import transport
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def _max_age_seconds(response: transport.Response) -> Optional[int]:
+    """Returns the Cache-Control max-age of a response, if any."""
+    match = _MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else None
+
+
+class CachingRequest(google_requests.Request):
+    """Requests transport that serves plain GETs from memory while they are fresh."""
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        self._cache: Dict[str, Tuple[float, transport.Response]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, url, method="GET", body=None, headers=None, timeout=120, **kwargs
+    ):
+        if method != "GET" or body is not None or headers:
+            return super().__call__(
+                url,
+                method=method,
+                body=body,
+                headers=headers,
+                timeout=timeout,
+                **kwargs,
+            )
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        response = super().__call__(url, method=method, timeout=timeout, **kwargs)
+
+        max_age = _max_age_seconds(response)
+        if response.status == 200 and max_age:
+            with self._lock:
+                self._cache[url] = (now + max_age, response)
+        return response
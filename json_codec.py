@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+JSON helpers backed by orjson when it is installed.
+Falls back to the standard library so orjson remains an optional speedup.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on installed extras
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def loads(data: str | bytes) -> Any:
+    """Parses JSON from str or bytes; bytes skip the UTF-8 decode step with orjson."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes obj to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -5,19 +5,25 @@ Multi-agent fiscal analysis system.
 Follows SOLID principles and project conventions.
 """
 
+import io
 import os
+import re
+import math
+import time
 import random
-import json
+import sqlite3
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Generator
+from typing import Dict, Any, List, Generator, Callable, Optional
 from dataclasses import dataclass
 from enum import Enum
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 
-import google.generativeai as genai
-import requests
 from dotenv import load_dotenv
 
+import json_codec
 from tabla_isr_constants import get_tabla_isr
 
 load_dotenv()
@@ -26,6 +32,19 @@ load_dotenv()
 DEBATE_MIN_CHARACTER = int(os.getenv("DEBATE_MIN_CHARACTER", "150"))
 DEBATE_MAX_CHARACTER = int(os.getenv("DEBATE_MAX_CHARACTER", "250"))
 
+# Voting strategy: "llm" asks each expert to vote, "local" scores interventions offline
+VOTING_MODE = os.getenv("VOTING_MODE", "llm").lower()
+# Upper bound on concurrent provider calls while collecting LLM votes
+VOTE_MAX_WORKERS = int(os.getenv("VOTE_MAX_WORKERS", "4"))
+
+# Optional on-disk cache for moderator outputs (disabled unless a path is set)
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH")
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "86400"))
+SUMMARY_CACHE_KEY_WINDOW = 4096
+CACHED_STREAM_CHUNK_SIZE = 64
+
+PROVIDER_ERROR_PREFIX = "[Error generando respuesta"
+
 
 class Personality(Enum):
     """Available personality types for agents."""
@@ -154,6 +173,8 @@ class DeepSeekProvider(LanguageModelProvider):
         self, messages: List[Dict[str, str]]
     ) -> Generator[str, None, None]:
         """Streams response from DeepSeek."""
+        import requests
+
         try:
             response = requests.post(
                 f"{self.base_url}/chat/completions",
@@ -175,22 +196,21 @@ class DeepSeekProvider(LanguageModelProvider):
 
             for line in response.iter_lines():
                 if line:
-                    line_str = line.decode("utf-8")
-                    if line_str.startswith("data: "):
-                        data_str = line_str[6:]
-                        if data_str.strip() == "[DONE]":
+                    if line.startswith(b"data: "):
+                        data_bytes = line[6:]
+                        if data_bytes.strip() == b"[DONE]":
                             break
                         try:
-                            data = json.loads(data_str)
+                            data = json_codec.loads(data_bytes)
                             if "choices" in data and len(data["choices"]) > 0:
                                 delta = data["choices"][0].get("delta", {})
                                 content = delta.get("content", "")
                                 if content:
                                     yield content
-                        except json.JSONDecodeError:
+                        except ValueError:
                             continue
         except Exception as e:
-            yield f"[Error generando respuesta: {str(e)}]"
+            yield f"{PROVIDER_ERROR_PREFIX}: {str(e)}]"
 
 
 class GeminiProvider(LanguageModelProvider):
@@ -200,8 +220,15 @@ class GeminiProvider(LanguageModelProvider):
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found")
+
+        # Imported lazily: the SDK pulls in grpc/protobuf and is only needed for Gemini
+        import google.generativeai as genai
+
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.generation_config = genai.types.GenerationConfig(
+            temperature=0.7, max_output_tokens=600
+        )
 
     def generate_stream(
         self, messages: List[Dict[str, str]]
@@ -212,15 +239,13 @@ class GeminiProvider(LanguageModelProvider):
             response = self.model.generate_content(
                 prompt,
                 stream=True,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7, max_output_tokens=600
-                ),
+                generation_config=self.generation_config,
             )
             for chunk in response:
                 if chunk.text:
                     yield chunk.text
         except Exception as e:
-            yield f"[Error generando respuesta: {str(e)}]"
+            yield f"{PROVIDER_ERROR_PREFIX}: {str(e)}]"
 
 
 class ModelProviderFactory:
@@ -239,6 +264,111 @@ class ModelProviderFactory:
                     "No AI provider available. Set DEEPSEEK_API_KEY or GEMINI_API_KEY"
                 )
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_shared() -> LanguageModelProvider:
+        """Returns a process-wide provider shared by every expert and the moderator."""
+        return ModelProviderFactory.create()
+
+
+class SummaryCache:
+    """SQLite-backed cache of moderator outputs keyed by a transcript digest."""
+
+    def __init__(self, db_path: str, ttl_seconds: int):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                key TEXT PRIMARY KEY,
+                summary TEXT,
+                ts INTEGER
+            )
+        """)
+        conn.execute(
+            "DELETE FROM summary_cache WHERE ts < ?",
+            (int(time.time()) - self.ttl_seconds,),
+        )
+        conn.commit()
+        conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached text for key if present and not expired."""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT summary FROM summary_cache WHERE key = ? AND ts >= ?",
+            (key, int(time.time()) - self.ttl_seconds),
+        ).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def set(self, key: str, summary: str) -> None:
+        """Stores summary under key, replacing any previous entry."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO summary_cache (key, summary, ts) VALUES (?, ?, ?)",
+            (key, summary, int(time.time())),
+        )
+        conn.commit()
+        conn.close()
+
+
+@lru_cache(maxsize=1)
+def get_summary_cache() -> Optional[SummaryCache]:
+    """Returns the shared summary cache, or None when SUMMARY_CACHE_PATH is unset."""
+    if not SUMMARY_CACHE_PATH:
+        return None
+    return SummaryCache(SUMMARY_CACHE_PATH, SUMMARY_CACHE_TTL_SECONDS)
+
+
+def _transcript_digest(*parts: str) -> str:
+    """Digest of the given parts, using only the tail of the transcript (last part)."""
+    *prefix, conversation = parts
+    payload = "\x00".join([*prefix, conversation[-SUMMARY_CACHE_KEY_WINDOW:]])
+    return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+
+
+def _chunk_string(text: str, size: int) -> Generator[str, None, None]:
+    """Replays text as fixed-size chunks to mimic a provider stream."""
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+def cached_stream(key_fn: Callable[..., str]):
+    """Caches the joined output of a streaming agent method in the summary cache.
+
+    Hits are replayed in CACHED_STREAM_CHUNK_SIZE chunks. Provider error
+    messages and streams abandoned by the consumer are never stored.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs) -> Generator[str, None, None]:
+            cache = get_summary_cache()
+            if cache is None:
+                yield from method(self, *args, **kwargs)
+                return
+
+            key = key_fn(*args, **kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                yield from _chunk_string(cached, CACHED_STREAM_CHUNK_SIZE)
+                return
+
+            chunks = []
+            for chunk in method(self, *args, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+
+            text = "".join(chunks)
+            if text and PROVIDER_ERROR_PREFIX not in text:
+                cache.set(key, text)
+
+        return wrapper
+
+    return decorator
+
 
 @dataclass
 class AgentProfile:
@@ -330,25 +460,14 @@ IMPORTANTE: Tu respuesta debe tener entre {DEBATE_MIN_CHARACTER}-{DEBATE_MAX_CHA
         yield from self.model_provider.generate_stream(messages)
 
     def vote(
-        self,
-        conversation_history: str,
-        options: List[str],
-        exclude_self_index: int = -1,
+        self, conversation_history: str, options_text: str
     ) -> Generator[str, None, None]:
-        """Votes for the best strategy discussed."""
-        # Filter out own option if exclude_self_index is provided
-        filtered_options = []
-        option_mapping = {}  # Maps displayed number to actual index
-
-        for i, opt in enumerate(options):
-            if i != exclude_self_index:
-                filtered_options.append(opt)
-                option_mapping[len(filtered_options)] = i + 1
-
-        options_text = "\n".join(
-            [f"{i + 1}. {opt}" for i, opt in enumerate(filtered_options)]
-        )
+        """Votes for the best strategy discussed.
 
+        Args:
+            conversation_history: Full debate transcript.
+            options_text: Numbered list of the other experts' strategies.
+        """
         messages = [
             {"role": "system", "content": self._build_system_prompt()},
             {
@@ -416,6 +535,11 @@ IMPORTANTE: Tu introducción debe tener entre {DEBATE_MIN_CHARACTER}-{DEBATE_MAX
 
         yield from self.model_provider.generate_stream(messages)
 
+    @cached_stream(
+        lambda round_number, conversation: _transcript_digest(
+            "summary", str(round_number), conversation
+        )
+    )
     def summarize_round(
         self, round_number: int, conversation: str
     ) -> Generator[str, None, None]:
@@ -457,6 +581,11 @@ IMPORTANTE: Tu anuncio debe tener entre {DEBATE_MIN_CHARACTER}-{DEBATE_MAX_CHARA
 
         yield from self.model_provider.generate_stream(messages)
 
+    @cached_stream(
+        lambda conversation, winning_strategy, vote_count: _transcript_digest(
+            "conclusion", winning_strategy, str(vote_count), conversation
+        )
+    )
     def conclude(
         self, conversation: str, winning_strategy: str, vote_count: Dict[str, int]
     ) -> Generator[str, None, None]:
@@ -504,6 +633,7 @@ class AgentFactory:
         ]
         random.shuffle(expert_names)
 
+        provider = ModelProviderFactory.get_shared()
         experts = []
         for i in range(count):
             profile = AgentProfile(
@@ -513,8 +643,6 @@ class AgentFactory:
                 personality_traits=PERSONALITY_CONFIGS[selected_personalities[i]],
                 profession_traits=PROFESSION_CONFIGS[selected_professions[i]],
             )
-
-            provider = ModelProviderFactory.create()
             experts.append(FiscalExpertAgent(profile, provider))
 
         return experts
@@ -522,8 +650,7 @@ class AgentFactory:
     @staticmethod
     def create_moderator() -> ModeratorAgent:
         """Creates the moderator agent."""
-        provider = ModelProviderFactory.create()
-        return ModeratorAgent(provider)
+        return ModeratorAgent(ModelProviderFactory.get_shared())
 
 
 def build_taxpayer_context(
@@ -554,6 +681,20 @@ LÍMITES {fiscal_year}:
 - UMA anual: ${constants.valor_uma_anual:,.2f}"""
 
 
+def _term_vector(text: str) -> Counter:
+    """Builds a bag-of-words term frequency vector for similarity scoring."""
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def _cosine_similarity(a: Counter, b: Counter) -> float:
+    """Cosine similarity between two term frequency vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[term] for term, count in a.items() if term in b)
+    norm = math.hypot(*a.values()) * math.hypot(*b.values())
+    return dot / norm if norm else 0.0
+
+
 @dataclass
 class MultiAgentAnalysisResult:
     """Complete result from multi-agent analysis."""
@@ -578,22 +719,45 @@ class MultiAgentConversationOrchestrator:
         self.experts = experts
         self.moderator = moderator
         self.taxpayer_context = taxpayer_context
-        self.conversation_history = ""
+        self._history_chunks: List[str] = []
+        self._history_text: Optional[str] = ""
         self.rounds_data: List[Dict[str, Any]] = []
 
+        # Expert identities are fixed for the session, so name lists are built once
+        names = [e.profile.name for e in experts]
+        self._other_names_by_index: List[List[str]] = [
+            names[:i] + names[i + 1 :] for i in range(len(names))
+        ]
+        self._expert_display_names: List[str] = [
+            f"{e.profile.name} ({e.profile.profession_traits.title})" for e in experts
+        ]
+
+    @property
+    def conversation_history(self) -> str:
+        """Full transcript, joined lazily and cached until the next entry."""
+        if self._history_text is None:
+            self._history_text = "".join(self._history_chunks)
+        return self._history_text
+
+    def add_to_history(self, speaker: str, content: str) -> None:
+        """Appends one speaker's intervention to the transcript."""
+        self._history_chunks.append(f"\n{speaker}: {content}\n")
+        self._history_text = None
+
+    def other_expert_names(self, expert_index: int) -> List[str]:
+        """Names of the experts debating with the expert at expert_index."""
+        return self._other_names_by_index[expert_index]
+
     def _collect_stream(self, generator: Generator[str, None, None]) -> str:
         """Collects all chunks from a generator into a single string."""
-        chunks = []
+        buffer = io.StringIO()
         for chunk in generator:
-            chunks.append(chunk)
-        return "".join(chunks)
+            buffer.write(chunk)
+        return buffer.getvalue()
 
     def _get_expert_names(self) -> List[str]:
         """Returns list of expert names."""
-        return [
-            f"{e.profile.name} ({e.profile.profession_traits.title})"
-            for e in self.experts
-        ]
+        return self._expert_display_names
 
     def run_analysis(self, total_rounds: int = 3) -> MultiAgentAnalysisResult:
         """Runs the complete multi-agent analysis with 3 rounds + voting + conclusion."""
@@ -631,25 +795,25 @@ class MultiAgentConversationOrchestrator:
             self.moderator.introduce_case(self.taxpayer_context, expert_names)
         )
 
-        self.conversation_history += f"\n{self.moderator.name}: {intro}\n"
+        self.add_to_history(self.moderator.name, intro)
 
     def _discussion_round(self, round_num: int):
         """Executes one discussion round with all experts."""
         round_data = {"round_number": round_num, "interventions": []}
 
-        other_names = [e.profile.name for e in self.experts]
-
-        for expert in self.experts:
-            others = [n for n in other_names if n != expert.profile.name]
-
+        for expert_index, expert in enumerate(self.experts):
             response = self._collect_stream(
                 expert.generate_analysis(
-                    self.taxpayer_context, self.conversation_history, others
+                    self.taxpayer_context,
+                    self.conversation_history,
+                    self.other_expert_names(expert_index),
                 )
             )
 
-            intervention = f"{expert.profile.name} ({expert.profile.profession_traits.title}): {response}"
-            self.conversation_history += f"\n{intervention}\n"
+            self.add_to_history(
+                f"{expert.profile.name} ({expert.profile.profession_traits.title})",
+                response,
+            )
 
             round_data["interventions"].append(
                 {
@@ -662,7 +826,7 @@ class MultiAgentConversationOrchestrator:
         summary = self._collect_stream(
             self.moderator.summarize_round(round_num, self.conversation_history)
         )
-        self.conversation_history += f"\n{self.moderator.name}: {summary}\n"
+        self.add_to_history(self.moderator.name, summary)
 
         round_data["moderator_summary"] = summary
         self.rounds_data.append(round_data)
@@ -670,61 +834,41 @@ class MultiAgentConversationOrchestrator:
     def _voting_phase(self) -> Dict[str, Any]:
         """Phase 4: Voting for best strategy."""
         announcement = self._collect_stream(self.moderator.announce_voting())
-        self.conversation_history += f"\n{self.moderator.name}: {announcement}\n"
+        self.add_to_history(self.moderator.name, announcement)
 
         expert_strategies = [
             f"{e.profile.name}: {e.profile.profession_traits.focus_areas}"
             for e in self.experts
         ]
+        # Each voter sees every strategy except their own, numbered from 1
+        options_text_by_voter = [
+            "\n".join(
+                f"{number}. {option}"
+                for number, option in enumerate(
+                    expert_strategies[:i] + expert_strategies[i + 1 :], start=1
+                )
+            )
+            for i in range(len(expert_strategies))
+        ]
+
+        if VOTING_MODE == "local" and self.rounds_data:
+            choices = self._local_vote_choices()
+        else:
+            choices = self._llm_vote_choices(options_text_by_voter)
 
         votes = []
         vote_details = []
 
-        for expert_index, expert in enumerate(self.experts):
-            # Expert votes, excluding themselves
-            vote_response = self._collect_stream(
-                expert.vote(self.conversation_history, expert_strategies, expert_index)
+        for expert, voted_index in zip(self.experts, choices):
+            voted_expert = self.experts[voted_index].profile.name
+            votes.append(voted_expert)
+            vote_details.append(
+                {"voter": expert.profile.name, "voted_for": voted_expert}
             )
 
-            try:
-                vote_num = int("".join(filter(str.isdigit, vote_response[:10])))
-
-                # Build mapping of available options (excluding self)
-                available_indices = [
-                    i for i in range(len(self.experts)) if i != expert_index
-                ]
-
-                # Validate vote is within valid range (1 or 2 for 3 experts)
-                if 1 <= vote_num <= len(available_indices):
-                    # Map vote number to actual expert index
-                    actual_expert_index = available_indices[vote_num - 1]
-                    voted_expert = self.experts[actual_expert_index].profile.name
-
-                    votes.append(voted_expert)
-                    vote_details.append(
-                        {"voter": expert.profile.name, "voted_for": voted_expert}
-                    )
-                else:
-                    # Invalid vote - default to first available expert (not self)
-                    default_expert = self.experts[available_indices[0]].profile.name
-                    votes.append(default_expert)
-                    vote_details.append(
-                        {"voter": expert.profile.name, "voted_for": default_expert}
-                    )
-            except (ValueError, IndexError):
-                # Error parsing vote - default to first available expert (not self)
-                available_indices = [
-                    i for i in range(len(self.experts)) if i != expert_index
-                ]
-                default_expert = self.experts[available_indices[0]].profile.name
-                votes.append(default_expert)
-                vote_details.append(
-                    {"voter": expert.profile.name, "voted_for": default_expert}
-                )
-
         vote_counts = Counter(votes)
         winner = (
-            vote_counts.most_common(1)[0][0]
+            max(vote_counts, key=vote_counts.__getitem__)
             if vote_counts
             else self.experts[0].profile.name
         )
@@ -740,6 +884,76 @@ class MultiAgentConversationOrchestrator:
             "winning_strategy": winning_expert.profile.profession_traits.focus_areas,
         }
 
+    def _llm_vote_choices(self, options_text_by_voter: List[str]) -> List[int]:
+        """Collects every expert's LLM vote concurrently.
+
+        Votes only read the finished transcript, so the provider calls are
+        independent and their network latency overlaps instead of adding up.
+        """
+        if not self.experts:
+            return []
+
+        conversation_history = self.conversation_history
+        max_workers = max(1, min(len(self.experts), VOTE_MAX_WORKERS))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda expert_index: self._llm_vote_choice(
+                        expert_index,
+                        self.experts[expert_index],
+                        conversation_history,
+                        options_text_by_voter[expert_index],
+                    ),
+                    range(len(self.experts)),
+                )
+            )
+
+    def _llm_vote_choice(
+        self,
+        expert_index: int,
+        expert: FiscalExpertAgent,
+        conversation_history: str,
+        options_text: str,
+    ) -> int:
+        """Asks the expert to vote and maps the answer to an expert index."""
+        # Experts cannot vote for themselves; invalid answers default to the first other expert
+        available_indices = [i for i in range(len(self.experts)) if i != expert_index]
+
+        vote_response = self._collect_stream(
+            expert.vote(conversation_history, options_text)
+        )
+
+        try:
+            vote_num = int("".join(filter(str.isdigit, vote_response[:10])))
+        except ValueError:
+            return available_indices[0]
+
+        if 1 <= vote_num <= len(available_indices):
+            return available_indices[vote_num - 1]
+        return available_indices[0]
+
+    def _local_vote_choices(self) -> List[int]:
+        """Votes without LLM calls by ranking interventions against the last summary.
+
+        Each expert votes for the other expert whose latest intervention is most
+        similar to the moderator's summary of the final round.
+        """
+        last_round = self.rounds_data[-1]
+        summary_vector = _term_vector(last_round["moderator_summary"])
+        scores = [
+            _cosine_similarity(_term_vector(intervention["content"]), summary_vector)
+            for intervention in last_round["interventions"]
+        ]
+
+        return [
+            max(
+                (i for i in range(len(self.experts)) if i != voter_index),
+                key=lambda i: scores[i],
+            )
+            for voter_index in range(len(self.experts))
+        ]
+
     def _conclusion_phase(self, voting_results: Dict[str, Any]) -> str:
         """Phase 5: Final conclusion."""
         conclusion = self._collect_stream(
@@ -750,9 +964,7 @@ class MultiAgentConversationOrchestrator:
             )
         )
 
-        self.conversation_history += (
-            f"\n{self.moderator.name} - CONCLUSIÓN FINAL: {conclusion}\n"
-        )
+        self.add_to_history(f"{self.moderator.name} - CONCLUSIÓN FINAL", conclusion)
         return conclusion
 
 
@@ -823,25 +1035,23 @@ class MultiAgentAnalysisService:
         # Introduction phase
         yield {"type": "phase", "phase": "introduction", "agent": moderator.name}
 
-        expert_names_list = [
-            f"{e.profile.name} ({e.profile.profession_traits.title})" for e in experts
-        ]
-
-        full_intro = []
-        for chunk in moderator.introduce_case(taxpayer_context, expert_names_list):
-            full_intro.append(chunk)
+        full_intro = io.StringIO()
+        for chunk in moderator.introduce_case(
+            taxpayer_context, orchestrator._get_expert_names()
+        ):
+            full_intro.write(chunk)
             yield {"type": "chunk", "content": chunk}
 
-        intro = "".join(full_intro)
-        orchestrator.conversation_history += f"\n{moderator.name}: {intro}\n"
+        intro = full_intro.getvalue()
+        orchestrator.add_to_history(moderator.name, intro)
         yield {"type": "intervention_complete"}
 
         # Three rounds of debate
         for round_num in range(1, 4):
             yield {"type": "phase", "phase": f"round_{round_num}"}
+            round_data = {"round_number": round_num, "interventions": []}
 
-            other_names = [e.profile.name for e in experts]
-            for expert in experts:
+            for expert_index, expert in enumerate(experts):
                 # Start new intervention for this expert
                 yield {
                     "type": "phase",
@@ -849,18 +1059,23 @@ class MultiAgentAnalysisService:
                     "agent": expert.profile.name,
                 }
 
-                others = [n for n in other_names if n != expert.profile.name]
-
-                full_response = []
+                full_response = io.StringIO()
                 for chunk in expert.generate_analysis(
-                    taxpayer_context, orchestrator.conversation_history, others
+                    taxpayer_context,
+                    orchestrator.conversation_history,
+                    orchestrator.other_expert_names(expert_index),
                 ):
-                    full_response.append(chunk)
+                    full_response.write(chunk)
                     yield {"type": "chunk", "content": chunk}
 
-                response = "".join(full_response)
-                orchestrator.conversation_history += (
-                    f"\n{expert.profile.name}: {response}\n"
+                response = full_response.getvalue()
+                orchestrator.add_to_history(expert.profile.name, response)
+                round_data["interventions"].append(
+                    {
+                        "agent": expert.profile.name,
+                        "profession": expert.profile.profession_traits.title,
+                        "content": response,
+                    }
                 )
 
                 yield {"type": "intervention_complete"}
@@ -872,15 +1087,17 @@ class MultiAgentAnalysisService:
                 "agent": moderator.name,
             }
 
-            full_summary = []
+            full_summary = io.StringIO()
             for chunk in moderator.summarize_round(
                 round_num, orchestrator.conversation_history
             ):
-                full_summary.append(chunk)
+                full_summary.write(chunk)
                 yield {"type": "chunk", "content": chunk}
 
-            summary = "".join(full_summary)
-            orchestrator.conversation_history += f"\n{moderator.name}: {summary}\n"
+            summary = full_summary.getvalue()
+            orchestrator.add_to_history(moderator.name, summary)
+            round_data["moderator_summary"] = summary
+            orchestrator.rounds_data.append(round_data)
             yield {"type": "intervention_complete"}
 
         # Voting phase
@@ -897,16 +1114,16 @@ class MultiAgentAnalysisService:
         # Conclusion phase
         yield {"type": "phase", "phase": "conclusion", "agent": moderator.name}
 
-        full_conclusion = []
+        full_conclusion = io.StringIO()
         for chunk in moderator.conclude(
             orchestrator.conversation_history,
             voting_results["winning_strategy"],
             voting_results["vote_counts"],
         ):
-            full_conclusion.append(chunk)
+            full_conclusion.write(chunk)
             yield {"type": "chunk", "content": chunk}
 
-        conclusion = "".join(full_conclusion)
+        conclusion = full_conclusion.getvalue()
         yield {"type": "intervention_complete"}
 
         yield {
@@ -1,31 +1,78 @@
 import os
+import asyncio
+import threading
 import urllib.parse
-from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 import sqlite3
 from pathlib import Path
 from datetime import date
+from bisect import bisect_right
+from functools import lru_cache
 
+import google.auth.exceptions
 import google.oauth2.id_token
-import google.auth.transport.requests as google_requests
-import requests
+import httpx
+import jinja2
 from fastapi import FastAPI, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    ORJSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import iterate_in_threadpool
 from pydantic import BaseModel, Field
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 
+import json_codec
 from fiscal_recommendations import RecommendationFactory
+from google_auth_transport import CachingRequest
 from tabla_isr_constants import TablaISR, get_tabla_isr
 from multi_agent_analysis import MultiAgentAnalysisService
 
 load_dotenv()
 
 
+DATABASE_PATH = Path("recommendations.db")
+
+# Applied to every connection; journal_mode=WAL also persists in the database file
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
+
+# Usage queries run as fixed text so sqlite3's per-connection statement cache reuses them
+USAGE_SELECT_SQL = (
+    "SELECT count FROM recommendation_usage WHERE user_id = ? AND date = ?"
+)
+USAGE_UPSERT_SQL = (
+    "INSERT INTO recommendation_usage (user_id, date, count) VALUES (?, ?, 1) "
+    "ON CONFLICT(user_id, date) DO UPDATE SET count = count + 1 "
+    "RETURNING count"
+)
+
+
+def connect_database(db_path: Path = DATABASE_PATH) -> sqlite3.Connection:
+    """Opens a connection with the project's SQLite PRAGMAs applied."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
 def initialize_database():
     """Initializes the database and creates the recommendation_usage table if it doesn't exist."""
-    db_path = Path("recommendations.db")
-    conn = sqlite3.connect(db_path)
+    conn = connect_database()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -41,9 +88,63 @@ def initialize_database():
     conn.close()
 
 
-initialize_database()
+class RecommendationUsageStore:
+    """Daily recommendation counters read and written over one reused SQLite connection."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection is shared by the event loop and threadpool workers
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_database(self.db_path)
+        return self._conn
+
+    def get_count(self, user_id: str, day: str) -> int:
+        """Returns how many recommendations user_id has used on day."""
+        with self._lock:
+            row = (
+                self._connection().execute(USAGE_SELECT_SQL, (user_id, day)).fetchone()
+            )
+        return row[0] if row else 0
+
+    def increment(self, user_id: str, day: str) -> int:
+        """Adds one use for user_id on day and returns the new count."""
+        with self._lock, self._connection() as conn:
+            row = conn.execute(USAGE_UPSERT_SQL, (user_id, day)).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+usage_store = RecommendationUsageStore(DATABASE_PATH)
+
+HTTP_CLIENT_TIMEOUT_SECONDS = 10.0
 
-fastapi_app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Owns resources shared across requests for the lifetime of the app."""
+    initialize_database()
+
+    # One pooled async client for outbound calls (Google OAuth token exchange)
+    async with httpx.AsyncClient(timeout=HTTP_CLIENT_TIMEOUT_SECONDS) as client:
+        app.state.http_client = client
+        try:
+            yield
+        finally:
+            usage_store.close()
+
+
+DefaultJSONResponse = ORJSONResponse if json_codec.HAS_ORJSON else JSONResponse
+
+fastapi_app = FastAPI(lifespan=lifespan, default_response_class=DefaultJSONResponse)
 app = fastapi_app  # Alias for uvicorn
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -51,6 +152,14 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/auth"
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GOOGLE_OAUTH_SCOPE = "openid email profile"
+# Tolerance for minor clock differences when verifying Google ID tokens
+GOOGLE_CLOCK_SKEW_SECONDS = 10
+# Shared transport: pooled HTTP session, certificates reused for their Cache-Control lifetime
+google_auth_request = CachingRequest()
+
 
 # Daily recommendations limit (configurable via env; defaults to 3)
 def _parse_int(value: Optional[str], default: int) -> int:
@@ -74,8 +183,20 @@ if not SECRET_KEY:
 
 
 fastapi_app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
-
-templates = Jinja2Templates(directory="templates")
+# Compresses the calculator page and JSON/markdown bodies; SSE streams are left uncompressed
+fastapi_app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+# Templates are compiled once and kept in memory; set TEMPLATES_AUTO_RELOAD=1 while editing them
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "0") == "1"
+
+templates = Jinja2Templates(
+    env=jinja2.Environment(
+        loader=jinja2.FileSystemLoader("templates"),
+        autoescape=True,
+        auto_reload=TEMPLATES_AUTO_RELOAD,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    )
+)
 
 
 def _build_external_base_url(request: Request) -> str:
@@ -106,6 +227,19 @@ def get_effective_redirect_uri(request: Request) -> str:
     return f"{base}/auth/callback"
 
 
+@lru_cache(maxsize=32)
+def build_google_auth_url(redirect_uri: str) -> str:
+    """Builds the Google consent URL; cached since it only varies by redirect URI."""
+    params = {
+        "client_id": GOOGLE_CLIENT_ID,
+        "redirect_uri": redirect_uri,
+        "scope": GOOGLE_OAUTH_SCOPE,
+        "response_type": "code",
+        "access_type": "offline",
+    }
+    return f"{GOOGLE_AUTH_URL}?{urllib.parse.urlencode(params)}"
+
+
 class TaxCalculationResult(BaseModel):
     """
     Represents the complete results of tax calculations, including income,
@@ -150,6 +284,7 @@ class TaxCalculationResult(BaseModel):
     balance_to_pay: float = Field(description="Additional tax amount to pay", ge=0.0)
 
     model_config = {
+        "frozen": True,
         "json_schema_extra": {
             "example": {
                 "gross_annual_income": 151200.00,
@@ -166,7 +301,7 @@ class TaxCalculationResult(BaseModel):
                 "balance_in_favor": 2499.75,
                 "balance_to_pay": 0.00,
             }
-        }
+        },
     }
 
     def get_effective_tax_rate(self) -> float:
@@ -217,12 +352,12 @@ class TaxCalculationResult(BaseModel):
 
 
 class DataReader:
-    def __init__(self, user_data_path: str):
+    def __init__(self, user_data_path: Optional[str] = None):
         self.user_data_path = user_data_path
 
-    def get_isr_table(self, fiscal_year: int) -> TablaISR:
-        from tabla_isr_constants import get_tabla_isr
-
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def get_isr_table(fiscal_year: int) -> TablaISR:
         try:
             return get_tabla_isr(fiscal_year)
         except Exception as e:
@@ -231,26 +366,36 @@ class DataReader:
             )
 
 
+# Shared reader; its ISR table cache is process-wide
+data_reader = DataReader()
+
+
 class TaxCalculator:
-    def __init__(self, user_data: Dict[str, Any], isr_table: TablaISR):
-        self.user_data = user_data
+    def __init__(self, tax_data: "TaxInputData", isr_table: TablaISR):
+        self.tax_data = tax_data
         self.isr_table = isr_table
 
+        self._constants = isr_table.constantes
+        self._monthly_income = tax_data.monthly_gross_income
+        self._daily_salary = self._monthly_income / 30
+
     def calculate_tax_balance(self) -> TaxCalculationResult:
-        gross_annual_income = self.user_data["monthly_gross_income"] * 12
+        gross_annual_income = self._monthly_income * 12
 
-        daily_salary = self.user_data["monthly_gross_income"] / 30
-        gross_bonus = daily_salary * self.user_data["bonus_days"]
+        daily_salary = self._daily_salary
+        gross_bonus = daily_salary * self.tax_data.bonus_days
         gross_vacation_premium = (
             daily_salary
-            * self.user_data["vacation_days"]
-            * self.user_data["vacation_premium_percentage"]
+            * self.tax_data.vacation_days
+            * self.tax_data.vacation_premium_percentage
         )
 
         total_gross_income = gross_annual_income + gross_bonus + gross_vacation_premium
 
-        taxable_bonus = self._calculate_taxable_bonus()
-        taxable_vacation_premium = self._calculate_taxable_vacation_premium()
+        taxable_bonus = self._calculate_taxable_bonus(gross_bonus)
+        taxable_vacation_premium = self._calculate_taxable_vacation_premium(
+            gross_vacation_premium
+        )
 
         total_taxable_income = (
             gross_annual_income + taxable_bonus + taxable_vacation_premium
@@ -268,15 +413,17 @@ class TaxCalculator:
             education_deductions,
         ) = self._calculate_authorized_deductions(total_gross_income)
 
-        taxable_base = max(0, total_taxable_income - authorized_deductions)
+        taxable_base = max(0.0, total_taxable_income - authorized_deductions)
         determined_tax = self._calculate_annual_tax(taxable_base)
-        withheld_tax = self._estimate_withheld_tax(taxable_income_without_deductions)
+        # Withholding is estimated as the tax on income before personal deductions
+        withheld_tax = self._calculate_annual_tax(taxable_income_without_deductions)
 
         difference = withheld_tax - determined_tax
-        balance_in_favor = max(0, difference)
-        balance_to_pay = max(0, -difference)
+        balance_in_favor = max(0.0, difference)
+        balance_to_pay = max(0.0, -difference)
 
-        return TaxCalculationResult(
+        # Every field is a non-negative float by construction, so validation is skipped
+        return TaxCalculationResult.model_construct(
             gross_annual_income=total_gross_income,
             taxable_bonus=taxable_bonus,
             taxable_vacation_premium=taxable_vacation_premium,
@@ -294,101 +441,72 @@ class TaxCalculator:
 
     def _calculate_annual_tax(self, taxable_base: float) -> float:
         monthly_base = taxable_base / 12
-        monthly_tax = 0.0
-
-        for bracket in self.isr_table.tabla_isr_mensual:
-            if bracket.limite_inferior <= monthly_base <= bracket.limite_superior:
-                surplus = monthly_base - bracket.limite_inferior + 0.01
-                monthly_tax = bracket.cuota_fija + (
-                    surplus * bracket.porcentaje_excedente
-                )
-                break
-
-        return monthly_tax * 12
+        table = self.isr_table
 
-    def _calculate_taxable_bonus(self) -> float:
-        monthly_income = self.user_data["monthly_gross_income"]
-        bonus_days = self.user_data["bonus_days"]
+        index = bisect_right(table.limites_inferiores, monthly_base) - 1
+        # Bases below the first bracket or in the cent gaps between brackets owe no tax
+        if index < 0 or monthly_base > table.limites_superiores[index]:
+            return 0.0
 
-        total_bonus = (monthly_income / 30) * bonus_days
-
-        uma_daily = self.isr_table.constantes.valor_uma_diario
-        exemption_umas = self.isr_table.constantes.exencion_aguinaldo_umas
-        bonus_exemption = uma_daily * exemption_umas
-
-        return max(0, total_bonus - bonus_exemption)
-
-    def _calculate_taxable_vacation_premium(self) -> float:
-        monthly_income = self.user_data["monthly_gross_income"]
-        vacation_days = self.user_data["vacation_days"]
-        premium_percentage = self.user_data["vacation_premium_percentage"]
-
-        total_premium = (monthly_income / 30) * vacation_days * premium_percentage
+        surplus = monthly_base - table.limites_inferiores[index] + 0.01
+        monthly_tax = table.cuotas_fijas[index] + (
+            surplus * table.porcentajes_excedentes[index]
+        )
 
-        uma_daily = self.isr_table.constantes.valor_uma_diario
-        exemption_umas = self.isr_table.constantes.exencion_prima_vacacional_umas
-        premium_exemption = uma_daily * exemption_umas
+        return monthly_tax * 12
 
-        return max(0, total_premium - premium_exemption)
+    def _calculate_taxable_bonus(self, gross_bonus: float) -> float:
+        return max(0.0, gross_bonus - self._constants.exencion_aguinaldo_mxn)
 
-    def _estimate_withheld_tax(
-        self,
-        taxable_income_without_deductions: float,
+    def _calculate_taxable_vacation_premium(
+        self, gross_vacation_premium: float
     ) -> float:
-        return self._calculate_annual_tax(taxable_income_without_deductions)
+        return max(
+            0.0, gross_vacation_premium - self._constants.exencion_prima_vacacional_mxn
+        )
 
     def _calculate_authorized_deductions(
         self,
         total_gross_income: float,
     ) -> tuple[float, float, float, float]:
-        total_general_deductions = self.user_data["general_deductions"]
-        total_ppr = self.user_data["total_ppr"]
-        total_tuition = self.user_data["total_tuition"]
+        total_general_deductions = self.tax_data.general_deductions
+        total_ppr = self.tax_data.total_ppr
+        total_tuition = self.tax_data.total_tuition
 
-        uma_annual = self.isr_table.constantes.valor_uma_anual
+        constants = self._constants
 
-        general_cap = (
-            uma_annual * self.isr_table.constantes.tope_general_deducciones_umas
+        limited_general_deductions = min(
+            total_general_deductions, constants.tope_general_deducciones_mxn
         )
-        limited_general_deductions = min(total_general_deductions, general_cap)
-
-        ppr_cap = uma_annual * self.isr_table.constantes.tope_ppr_deducciones_umas
-        limited_ppr = min(total_ppr, ppr_cap)
+        limited_ppr = min(total_ppr, constants.tope_ppr_deducciones_mxn)
 
         # For education deductions, we apply the maximum cap across all levels
         # as a simplified approach.
-        education_caps = {
-            "preescolar": self.isr_table.topes_colegiaturas.preescolar,
-            "primaria": self.isr_table.topes_colegiaturas.primaria,
-            "secundaria": self.isr_table.topes_colegiaturas.secundaria,
-            "profesional_tecnico": self.isr_table.topes_colegiaturas.profesional_tecnico,
-            "preparatoria": self.isr_table.topes_colegiaturas.preparatoria,
-        }
-        max_education_cap = max(education_caps.values()) if education_caps else 0
+        max_education_cap = self.isr_table.topes_colegiaturas.tope_maximo
         limited_education_deductions = min(total_tuition, max_education_cap)
 
-        cap_5_umas = uma_annual * 5
         cap_15_percent = total_gross_income * 0.15
-        total_legal_cap = min(cap_5_umas, cap_15_percent)
+        total_legal_cap = min(constants.tope_global_deducciones_mxn, cap_15_percent)
 
         total_uncapped = (
             limited_general_deductions + limited_ppr + limited_education_deductions
         )
-        total_capped = min(total_uncapped, total_legal_cap)
 
-        if total_capped < total_uncapped:
-            adjustment_factor = (
-                total_capped / total_uncapped if total_uncapped > 0 else 0
+        if total_uncapped <= total_legal_cap:
+            return (
+                total_uncapped,
+                limited_general_deductions,
+                limited_ppr,
+                limited_education_deductions,
             )
-            limited_general_deductions *= adjustment_factor
-            limited_ppr *= adjustment_factor
-            limited_education_deductions *= adjustment_factor
 
+        # Over the legal cap (so total_uncapped > 0): scale each deduction proportionally
+        adjustment_factor = total_legal_cap / total_uncapped
         return (
-            total_capped,
-            limited_general_deductions,
-            limited_ppr,
-            limited_education_deductions,
+            total_legal_cap,
+            limited_general_deductions * adjustment_factor,
+            limited_ppr * adjustment_factor,
+            limited_education_deductions * adjustment_factor,
         )
 
 
@@ -399,7 +517,7 @@ async def get_current_user(request: Request) -> Optional[Dict[str, Any]]:
     return None
 
 
-@fastapi_app.get("/")
+@fastapi_app.get("/", response_class=RedirectResponse)
 async def read_root():
     """Redirects the root path to the calculator page."""
     return RedirectResponse(url="/calculator", status_code=302)
@@ -476,129 +594,122 @@ class TaxInputData(BaseModel):
                 "total_tuition": 25000.00,
                 "total_ppr": 15000.00,
             }
-        }
+        },
     }
 
 
-@fastapi_app.post("/api/calculate")
-def calculate_tax_dynamically(tax_data: TaxInputData) -> Dict[str, Any]:
-    user_data = {
-        "taxpayer_name": tax_data.taxpayer_name,
-        "fiscal_year": tax_data.fiscal_year,
-        "monthly_gross_income": tax_data.monthly_gross_income,
-        "monthly_net_income": tax_data.monthly_net_income,
-        "bonus_days": tax_data.bonus_days,
-        "vacation_days": tax_data.vacation_days,
-        "vacation_premium_percentage": tax_data.vacation_premium_percentage,
-        "general_deductions": tax_data.general_deductions,
-        "total_tuition": tax_data.total_tuition,
-        "total_ppr": tax_data.total_ppr,
-    }
-
-    data_reader = DataReader("")
-    isr_table = data_reader.get_isr_table(tax_data.fiscal_year)
+@lru_cache(maxsize=1024)
+def _calculate_tax_result_cached(
+    fiscal_year: int,
+    monthly_gross_income: float,
+    bonus_days: int,
+    vacation_days: int,
+    vacation_premium_percentage: float,
+    general_deductions: float,
+    total_tuition: float,
+    total_ppr: float,
+) -> TaxCalculationResult:
+    # Keyed only on calculator inputs, so taxpayer names are never held in the cache
+    tax_data = TaxInputData.model_construct(
+        fiscal_year=fiscal_year,
+        monthly_gross_income=monthly_gross_income,
+        bonus_days=bonus_days,
+        vacation_days=vacation_days,
+        vacation_premium_percentage=vacation_premium_percentage,
+        general_deductions=general_deductions,
+        total_tuition=total_tuition,
+        total_ppr=total_ppr,
+    )
+    isr_table = data_reader.get_isr_table(fiscal_year)
+    return TaxCalculator(tax_data, isr_table).calculate_tax_balance()
+
+
+def calculate_tax_result(tax_data: TaxInputData) -> TaxCalculationResult:
+    """Calculates the tax balance; identical numeric inputs reuse the frozen result."""
+    return _calculate_tax_result_cached(
+        tax_data.fiscal_year,
+        tax_data.monthly_gross_income,
+        tax_data.bonus_days,
+        tax_data.vacation_days,
+        tax_data.vacation_premium_percentage,
+        tax_data.general_deductions,
+        tax_data.total_tuition,
+        tax_data.total_ppr,
+    )
 
-    tax_calculator = TaxCalculator(user_data, isr_table)
-    calculation_result = tax_calculator.calculate_tax_balance()
 
+def build_recommendation_user_data(tax_data: TaxInputData) -> Dict[str, Any]:
+    """Builds the taxpayer context expected by the recommendation and debate prompts."""
     return {
-        "taxpayer_name": tax_data.taxpayer_name,
-        "fiscal_year": tax_data.fiscal_year,
-        "gross_annual_income": calculation_result.gross_annual_income,
-        "taxable_bonus": calculation_result.taxable_bonus,
-        "taxable_vacation_premium": calculation_result.taxable_vacation_premium,
-        "total_taxable_income": calculation_result.total_taxable_income,
-        "authorized_deductions": calculation_result.authorized_deductions,
-        "personal_deductions": calculation_result.personal_deductions,
-        "ppr_deductions": calculation_result.ppr_deductions,
-        "education_deductions": calculation_result.education_deductions,
-        "taxable_base": calculation_result.taxable_base,
-        "determined_tax": calculation_result.determined_tax,
-        "withheld_tax": calculation_result.withheld_tax,
-        "balance_in_favor": calculation_result.balance_in_favor,
-        "balance_to_pay": calculation_result.balance_to_pay,
+        "contribuyente": {
+            "nombre_o_referencia": tax_data.taxpayer_name or "Usuario",
+            "ejercicio_fiscal": tax_data.fiscal_year,
+        },
+        "ingresos": {
+            "ingreso_bruto_mensual_ordinario": tax_data.monthly_gross_income,
+            "dias_aguinaldo": tax_data.bonus_days,
+            "dias_vacaciones_anuales": tax_data.vacation_days,
+        },
     }
 
 
-def get_user_recommendation_usage(user_id: str) -> int:
-    """Gets the recommendation usage count for a user for the current day."""
-    today = date.today().isoformat()
-
-    conn = sqlite3.connect("recommendations.db")
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT count FROM recommendation_usage WHERE user_id = ? AND date = ?",
-        (user_id, today),
-    )
-
-    result = cursor.fetchone()
-    conn.close()
-
-    return result[0] if result else 0
-
-
-def increment_user_recommendation_usage(user_id: str) -> int:
-    """Increments the recommendation usage count for a user for the current day."""
-    today = date.today().isoformat()
-
-    conn = sqlite3.connect("recommendations.db")
-    cursor = conn.cursor()
+@fastapi_app.post("/api/calculate")
+async def calculate_tax_dynamically(tax_data: TaxInputData) -> Response:
+    calculation_result = calculate_tax_result(tax_data)
 
-    cursor.execute(
-        "UPDATE recommendation_usage SET count = count + 1 WHERE user_id = ? AND date = ?",
-        (user_id, today),
-    )
+    # The result's own dump is the response body; identity fields are added in place
+    payload = calculation_result.model_dump()
+    payload["taxpayer_name"] = tax_data.taxpayer_name
+    payload["fiscal_year"] = tax_data.fiscal_year
 
-    if cursor.rowcount == 0:
-        cursor.execute(
-            "INSERT INTO recommendation_usage (user_id, date, count) VALUES (?, ?, 1)",
-            (user_id, today),
-        )
+    # Content is only str/int/float, so the response is rendered without jsonable_encoder
+    return DefaultJSONResponse(payload)
 
-    cursor.execute(
-        "SELECT count FROM recommendation_usage WHERE user_id = ? AND date = ?",
-        (user_id, today),
-    )
 
-    result = cursor.fetchone()
-    count = result[0] if result else 1
+async def get_user_recommendation_usage(user_id: str, today: str) -> int:
+    """Gets the recommendation usage count for a user on the given ISO date."""
+    # SQLite calls block, so they run in a worker thread instead of on the event loop
+    return await asyncio.to_thread(usage_store.get_count, user_id, today)
 
-    conn.commit()
-    conn.close()
 
-    return count
+async def increment_user_recommendation_usage(user_id: str, today: str) -> int:
+    """Increments the recommendation usage count for a user on the given ISO date."""
+    return await asyncio.to_thread(usage_store.increment, user_id, today)
 
 
 @fastapi_app.get("/api/recommendations/usage")
 async def get_recommendation_usage(
     user: Optional[Dict[str, Any]] = Depends(get_current_user),
-):
+) -> Response:
     """Gets the current user's recommendation usage for today."""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
 
     user_id = user.get("sub", user.get("email", "unknown"))
-    used_today = get_user_recommendation_usage(user_id)
+    today = date.today().isoformat()
+    used_today = await get_user_recommendation_usage(user_id, today)
     daily_limit = DAILY_RECOMMENDATIONS_LIMIT
 
-    return {
-        "used_today": used_today,
-        "daily_limit": daily_limit,
-        "remaining": max(0, daily_limit - used_today),
-    }
+    return DefaultJSONResponse(
+        {
+            "used_today": used_today,
+            "daily_limit": daily_limit,
+            "remaining": max(0, daily_limit - used_today),
+        }
+    )
 
 
 @fastapi_app.post("/api/recommendations")
 async def generate_recommendations(
     tax_data: TaxInputData, user: Optional[Dict[str, Any]] = Depends(get_current_user)
-) -> Dict[str, Any]:
+) -> Response:
     """Generates fiscal recommendations with a daily limit."""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
 
     user_id = user.get("sub", user.get("email", "unknown"))
-    used_today = get_user_recommendation_usage(user_id)
+    today = date.today().isoformat()
+    used_today = await get_user_recommendation_usage(user_id, today)
     daily_limit = DAILY_RECOMMENDATIONS_LIMIT
 
     if used_today >= daily_limit:
@@ -608,43 +719,19 @@ async def generate_recommendations(
         )
 
     try:
-        user_data_for_recommendations = {
-            "contribuyente": {
-                "nombre_o_referencia": tax_data.taxpayer_name or "Usuario",
-                "ejercicio_fiscal": tax_data.fiscal_year,
-            },
-            "ingresos": {
-                "ingreso_bruto_mensual_ordinario": tax_data.monthly_gross_income,
-                "dias_aguinaldo": tax_data.bonus_days,
-                "dias_vacaciones_anuales": tax_data.vacation_days,
-            },
-        }
-
-        user_data_for_calculation = {
-            "taxpayer_name": tax_data.taxpayer_name,
-            "fiscal_year": tax_data.fiscal_year,
-            "monthly_gross_income": tax_data.monthly_gross_income,
-            "monthly_net_income": tax_data.monthly_net_income,
-            "bonus_days": tax_data.bonus_days,
-            "vacation_days": tax_data.vacation_days,
-            "vacation_premium_percentage": tax_data.vacation_premium_percentage,
-            "general_deductions": tax_data.general_deductions,
-            "total_tuition": tax_data.total_tuition,
-            "total_ppr": tax_data.total_ppr,
-        }
+        user_data_for_recommendations = build_recommendation_user_data(tax_data)
 
-        data_reader = DataReader("")
-        isr_table = data_reader.get_isr_table(tax_data.fiscal_year)
-        tax_calculator = TaxCalculator(user_data_for_calculation, isr_table)
-        calculation_result = tax_calculator.calculate_tax_balance()
+        calculation_result = calculate_tax_result(tax_data)
 
-        recommendation_service = RecommendationFactory.create_service(use_ai=True)
+        recommendation_service = RecommendationFactory.get_shared()
 
-        accumulated_text = ""
-        for chunk in recommendation_service.get_recommendations_stream(
-            calculation_result, user_data_for_recommendations, tax_data.fiscal_year
-        ):
-            accumulated_text += chunk
+        # The provider client blocks, so the whole response is collected off the event loop
+        accumulated_text = await asyncio.to_thread(
+            "".join,
+            recommendation_service.get_recommendations_stream(
+                calculation_result, user_data_for_recommendations, tax_data.fiscal_year
+            ),
+        )
 
         if hasattr(recommendation_service.primary_generator, "_process_response"):
             recommendations_markdown = (
@@ -655,16 +742,18 @@ async def generate_recommendations(
         else:
             recommendations_markdown = accumulated_text
 
-        new_count = increment_user_recommendation_usage(user_id)
+        new_count = await increment_user_recommendation_usage(user_id, today)
 
-        return {
-            "recommendations_markdown": recommendations_markdown,
-            "usage_info": {
-                "used_today": new_count,
-                "daily_limit": daily_limit,
-                "remaining": max(0, daily_limit - new_count),
-            },
-        }
+        return DefaultJSONResponse(
+            {
+                "recommendations_markdown": recommendations_markdown,
+                "usage_info": {
+                    "used_today": new_count,
+                    "daily_limit": daily_limit,
+                    "remaining": max(0, daily_limit - new_count),
+                },
+            }
+        )
     except Exception as e:
         print(f"Error generating recommendations: {e}")
         # Fallback to simple recommendations if there's an error
@@ -675,16 +764,36 @@ async def generate_recommendations(
             "<li><strong>Documentación organizada:</strong> Mantén un archivo digital de todos tus comprobantes fiscales durante el año para facilitar tu declaración.</li>",
         ]
 
-        new_count = increment_user_recommendation_usage(user_id)
+        new_count = await increment_user_recommendation_usage(user_id, today)
 
-        return {
-            "recommendations": fallback_recommendations,
-            "usage_info": {
-                "used_today": new_count,
-                "daily_limit": daily_limit,
-                "remaining": max(0, daily_limit - new_count),
-            },
-        }
+        return DefaultJSONResponse(
+            {
+                "recommendations": fallback_recommendations,
+                "usage_info": {
+                    "used_today": new_count,
+                    "daily_limit": daily_limit,
+                    "remaining": max(0, daily_limit - new_count),
+                },
+            }
+        )
+
+
+SSE_INTERVENTION_COMPLETE_FRAME = b'data: {"type":"intervention_complete"}\n\n'
+SSE_CHUNK_FRAME_PREFIX = b'data: {"type":"chunk","content":'
+
+
+def encode_sse_event(event: Dict[str, Any]) -> bytes:
+    """Encodes a streaming event as an SSE frame.
+
+    Token chunks and intervention markers dominate the streams, so their frames
+    are assembled from pre-encoded bytes instead of serializing the whole dict.
+    """
+    event_type = event["type"]
+    if event_type == "chunk":
+        return SSE_CHUNK_FRAME_PREFIX + json_codec.dumps(event["content"]) + b"}\n\n"
+    if event_type == "intervention_complete":
+        return SSE_INTERVENTION_COMPLETE_FRAME
+    return b"data: " + json_codec.dumps(event) + b"\n\n"
 
 
 @fastapi_app.post("/api/recommendations/stream")
@@ -698,7 +807,8 @@ async def generate_recommendations_stream(
         raise HTTPException(status_code=401, detail="Authentication required")
 
     user_id = user.get("sub", user.get("email", "unknown"))
-    used_today = get_user_recommendation_usage(user_id)
+    today = date.today().isoformat()
+    used_today = await get_user_recommendation_usage(user_id, today)
     daily_limit = DAILY_RECOMMENDATIONS_LIMIT
 
     if used_today >= daily_limit:
@@ -709,44 +819,23 @@ async def generate_recommendations_stream(
 
     async def generate_stream():
         try:
-            user_data_for_recommendations = {
-                "contribuyente": {
-                    "nombre_o_referencia": tax_data.taxpayer_name or "Usuario",
-                    "ejercicio_fiscal": tax_data.fiscal_year,
-                },
-                "ingresos": {
-                    "ingreso_bruto_mensual_ordinario": tax_data.monthly_gross_income,
-                    "dias_aguinaldo": tax_data.bonus_days,
-                    "dias_vacaciones_anuales": tax_data.vacation_days,
-                },
-            }
-
-            user_data_for_calculation = {
-                "taxpayer_name": tax_data.taxpayer_name,
-                "fiscal_year": tax_data.fiscal_year,
-                "monthly_gross_income": tax_data.monthly_gross_income,
-                "monthly_net_income": tax_data.monthly_net_income,
-                "bonus_days": tax_data.bonus_days,
-                "vacation_days": tax_data.vacation_days,
-                "vacation_premium_percentage": tax_data.vacation_premium_percentage,
-                "general_deductions": tax_data.general_deductions,
-                "total_tuition": tax_data.total_tuition,
-                "total_ppr": tax_data.total_ppr,
-            }
+            user_data_for_recommendations = build_recommendation_user_data(tax_data)
 
-            data_reader = DataReader("")
-            isr_table = data_reader.get_isr_table(tax_data.fiscal_year)
-            tax_calculator = TaxCalculator(user_data_for_calculation, isr_table)
-            calculation_result = tax_calculator.calculate_tax_balance()
+            calculation_result = calculate_tax_result(tax_data)
 
-            recommendation_service = RecommendationFactory.create_service(use_ai=True)
+            recommendation_service = RecommendationFactory.get_shared()
 
             print("🚀 Starting streaming recommendations...")
-            yield 'data: {"type":"start"}\n\n'
-
-            accumulated_text = ""
-            for chunk in recommendation_service.get_recommendations_stream(
-                calculation_result, user_data_for_recommendations, tax_data.fiscal_year
+            yield encode_sse_event({"type": "start"})
+
+            streamed_text = False
+            # Each blocking provider read runs in the threadpool, keeping the event loop free
+            async for chunk in iterate_in_threadpool(
+                recommendation_service.get_recommendations_stream(
+                    calculation_result,
+                    user_data_for_recommendations,
+                    tax_data.fiscal_year,
+                )
             ):
                 if await request.is_disconnected():
                     print(
@@ -754,36 +843,19 @@ async def generate_recommendations_stream(
                     )
                     break
 
-                accumulated_text += chunk
-                escaped_chunk = chunk.replace('"', '\\"').replace("\n", "\\n")
-                yield f'data: {{"type":"chunk","content":"{escaped_chunk}"}}\n\n'
+                streamed_text = streamed_text or bool(chunk.strip())
+                yield encode_sse_event({"type": "chunk", "content": chunk})
 
-            if hasattr(recommendation_service.primary_generator, "_process_response"):
-                processed_markdown = (
-                    recommendation_service.primary_generator._process_response(
-                        accumulated_text
-                    )
-                )
-                escaped_markdown = (
-                    processed_markdown.replace('"', '\\"')
-                    .replace(chr(10), "\\n")
-                    .replace(chr(13), "\\r")
-                )
-                yield f'data: {{"type":"complete","markdown":"{escaped_markdown}"}}\n\n'
-            else:
-                fallback_markdown = (
-                    accumulated_text
-                    if accumulated_text
-                    else "**Error:** No se pudieron generar recomendaciones."
-                )
-                escaped_fallback = (
-                    fallback_markdown.replace('"', '\\"')
-                    .replace(chr(10), "\\n")
-                    .replace(chr(13), "\\r")
+            # The client renders the text it accumulated from the chunks; markdown is
+            # only sent when there is nothing usable to render
+            complete_event: Dict[str, Any] = {"type": "complete"}
+            if not streamed_text:
+                complete_event["markdown"] = (
+                    "**Error:** No se pudieron generar recomendaciones."
                 )
-                yield f'data: {{"type":"complete","markdown":"{escaped_fallback}"}}\n\n'
+            yield encode_sse_event(complete_event)
 
-            increment_user_recommendation_usage(user_id)
+            await increment_user_recommendation_usage(user_id, today)
 
         except GeneratorExit:
             print("⚠️ Recommendations stream generator closed by client")
@@ -795,41 +867,26 @@ async def generate_recommendations_stream(
         except Exception as e:
             print(f"Error in streaming: {e}")
             error_markdown = "**Error temporal:** Ocurrió un problema generando las recomendaciones. Por favor, intenta nuevamente."
-            yield f'data: {{"type":"error","markdown":"{error_markdown}"}}\n\n'
+            yield encode_sse_event({"type": "error", "markdown": error_markdown})
 
     return StreamingResponse(
         generate_stream(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        },
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
     )
 
 
-@fastapi_app.get("/auth/google")
+@fastapi_app.get("/auth/google", response_class=RedirectResponse)
 async def google_auth(request: Request):
     """Redirects to Google OAuth for authentication."""
     redirect_uri = get_effective_redirect_uri(request)
-    params = {
-        "client_id": GOOGLE_CLIENT_ID,
-        "redirect_uri": redirect_uri,
-        "scope": "openid email profile",
-        "response_type": "code",
-        "access_type": "offline",
-    }
-    google_auth_url = (
-        "https://accounts.google.com/o/oauth2/auth?" + urllib.parse.urlencode(params)
-    )
-    return RedirectResponse(url=google_auth_url)
+    return RedirectResponse(url=build_google_auth_url(redirect_uri))
 
 
-@fastapi_app.get("/auth/callback")
+@fastapi_app.get("/auth/callback", response_class=RedirectResponse)
 async def google_callback(request: Request, code: str):
     """Handles the Google OAuth callback."""
     try:
-        token_url = "https://oauth2.googleapis.com/token"
         redirect_uri = get_effective_redirect_uri(request)
         token_data = {
             "client_id": GOOGLE_CLIENT_ID,
@@ -839,16 +896,19 @@ async def google_callback(request: Request, code: str):
             "redirect_uri": redirect_uri,
         }
 
-        token_response = requests.post(token_url, data=token_data)
-        token_json = token_response.json()
+        token_response = await request.app.state.http_client.post(
+            GOOGLE_TOKEN_URL, data=token_data
+        )
+        token_json = json_codec.loads(token_response.content)
         id_token = token_json["id_token"]
 
-        # Verify token with clock skew tolerance to handle minor time differences
-        user_info = google.oauth2.id_token.verify_oauth2_token(
+        # Verification fetches Google's certificates synchronously; keep it off the loop
+        user_info = await asyncio.to_thread(
+            google.oauth2.id_token.verify_oauth2_token,
             id_token,
-            google_requests.Request(),
+            google_auth_request,
             GOOGLE_CLIENT_ID,
-            clock_skew_in_seconds=10,
+            clock_skew_in_seconds=GOOGLE_CLOCK_SKEW_SECONDS,
         )
 
         request.session["user"] = {
@@ -859,8 +919,14 @@ async def google_callback(request: Request, code: str):
 
         return RedirectResponse(url="/calculator", status_code=302)
 
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
+    except (
+        KeyError,
+        ValueError,
+        httpx.HTTPError,
+        google.auth.exceptions.GoogleAuthError,
+    ) as e:
+        print(f"Authentication failed: {e!r}")
+        raise HTTPException(status_code=400, detail="Authentication failed")
 
 
 @fastapi_app.post("/api/multi-agent-analysis")
@@ -872,34 +938,26 @@ async def multi_agent_analysis_stream(
     """Generate fiscal recommendations using multi-agent debate system with streaming."""
     try:
         user_id = user.get("sub", user.get("email", "unknown"))
+        today = date.today().isoformat()
 
         # Check daily recommendation limit
-        usage = get_user_recommendation_usage(user_id)
+        usage = await get_user_recommendation_usage(user_id, today)
         if usage >= DAILY_RECOMMENDATIONS_LIMIT:
 
             async def error_stream():
-                yield f'data: {{"type": "error", "message": "Daily recommendation limit reached ({DAILY_RECOMMENDATIONS_LIMIT}). Try again tomorrow."}}\n\n'
+                yield encode_sse_event(
+                    {
+                        "type": "error",
+                        "message": f"Daily recommendation limit reached ({DAILY_RECOMMENDATIONS_LIMIT}). Try again tomorrow.",
+                    }
+                )
 
             return StreamingResponse(error_stream(), media_type="text/event-stream")
 
         # Calculate taxes first
-        isr_table = get_tabla_isr(tax_data.fiscal_year)
-        user_data_for_calculation = tax_data.model_dump()
-        tax_calculator = TaxCalculator(user_data_for_calculation, isr_table)
-        calculation_result = tax_calculator.calculate_tax_balance()
-
-        # Format user_data for multi-agent analysis (needs 'contribuyente' key)
-        user_data_formatted = {
-            "contribuyente": {
-                "nombre_o_referencia": tax_data.taxpayer_name or "Usuario",
-                "ejercicio_fiscal": tax_data.fiscal_year,
-            },
-            "ingresos": {
-                "ingreso_bruto_mensual_ordinario": tax_data.monthly_gross_income,
-                "dias_aguinaldo": tax_data.bonus_days,
-                "dias_vacaciones_anuales": tax_data.vacation_days,
-            },
-        }
+        calculation_result = calculate_tax_result(tax_data)
+
+        user_data_formatted = build_recommendation_user_data(tax_data)
 
         # Create streaming generator
         async def event_generator():
@@ -909,7 +967,8 @@ async def multi_agent_analysis_stream(
                     calculation_result, user_data_formatted, tax_data.fiscal_year
                 )
 
-                for event in generator:
+                # Debate rounds block on LLM calls; step the generator in the threadpool
+                async for event in iterate_in_threadpool(generator):
                     # Check if client is still connected
                     if await request.is_disconnected():
                         print("Client disconnected, stopping stream")
@@ -920,12 +979,10 @@ async def multi_agent_analysis_stream(
                                 pass
                         return
 
-                    import json
-
-                    yield f"data: {json.dumps(event)}\n\n"
+                    yield encode_sse_event(event)
 
                 # Increment usage counter after successful generation
-                increment_user_recommendation_usage(user_id)
+                await increment_user_recommendation_usage(user_id, today)
 
             except GeneratorExit:
                 # Client disconnected (most common case)
@@ -948,8 +1005,6 @@ async def multi_agent_analysis_stream(
                         pass
                 return
             except Exception as e:
-                import json
-
                 if generator:
                     try:
                         generator.close()
@@ -957,7 +1012,7 @@ async def multi_agent_analysis_stream(
                         pass
 
                 try:
-                    yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+                    yield encode_sse_event({"type": "error", "message": str(e)})
                 except (GeneratorExit, ConnectionError, BrokenPipeError, RuntimeError):
                     print("Could not send error message, client disconnected")
                     return
@@ -972,7 +1027,7 @@ async def multi_agent_analysis_stream(
         )
 
 
-@fastapi_app.get("/logout")
+@fastapi_app.get("/logout", response_class=RedirectResponse)
 async def logout(request: Request):
     """Logs the user out by clearing the session."""
     request.session.pop("user", None)
@@ -982,4 +1037,10 @@ async def logout(request: Request):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(fastapi_app, host="0.0.0.0", port=8000)
+    # uvicorn picks uvloop and httptools when installed; an import string allows workers
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=_parse_int(os.getenv("WEB_CONCURRENCY"), 1),
+    )
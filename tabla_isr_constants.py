@@ -4,11 +4,12 @@ Constantes de la tabla ISR para múltiples ejercicios fiscales
 Más eficiente que cargar archivos JSON en runtime
 """
 
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import List, Mapping, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TramoPorcentaje:
     """Representa un tramo de la tabla ISR mensual"""
 
@@ -18,7 +19,7 @@ class TramoPorcentaje:
     porcentaje_excedente: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ConstantesISR:
     """Constantes fiscales para un ejercicio específico"""
 
@@ -30,8 +31,42 @@ class ConstantesISR:
     tope_general_deducciones_umas: float
     tope_ppr_deducciones_umas: float
 
-
-@dataclass
+    # Montos en pesos derivados de la UMA, calculados una sola vez por ejercicio
+    exencion_aguinaldo_mxn: float = field(init=False, repr=False)
+    exencion_prima_vacacional_mxn: float = field(init=False, repr=False)
+    tope_general_deducciones_mxn: float = field(init=False, repr=False)
+    tope_ppr_deducciones_mxn: float = field(init=False, repr=False)
+    tope_global_deducciones_mxn: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # La instancia es inmutable; los montos derivados se asignan una sola vez aquí
+        object.__setattr__(
+            self,
+            "exencion_aguinaldo_mxn",
+            self.valor_uma_diario * self.exencion_aguinaldo_umas,
+        )
+        object.__setattr__(
+            self,
+            "exencion_prima_vacacional_mxn",
+            self.valor_uma_diario * self.exencion_prima_vacacional_umas,
+        )
+        object.__setattr__(
+            self,
+            "tope_general_deducciones_mxn",
+            self.valor_uma_anual * self.tope_general_deducciones_umas,
+        )
+        object.__setattr__(
+            self,
+            "tope_ppr_deducciones_mxn",
+            self.valor_uma_anual * self.tope_ppr_deducciones_umas,
+        )
+        # Tope global de deducciones personales: 5 UMAs anuales
+        object.__setattr__(
+            self, "tope_global_deducciones_mxn", self.valor_uma_anual * 5
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class TopesColegiaturas:
     """Límites de deducibilidad para colegiaturas por nivel educativo"""
 
@@ -41,8 +76,21 @@ class TopesColegiaturas:
     profesional_tecnico: float
     preparatoria: float
 
+    # Tope más alto entre niveles, calculado una sola vez por ejercicio
+    tope_maximo: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        tope_maximo = max(
+            self.preescolar,
+            self.primaria,
+            self.secundaria,
+            self.profesional_tecnico,
+            self.preparatoria,
+        )
+        object.__setattr__(self, "tope_maximo", tope_maximo)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class TablaISR:
     """Tabla ISR completa para un ejercicio fiscal"""
 
@@ -51,6 +99,23 @@ class TablaISR:
     topes_colegiaturas: TopesColegiaturas
     tabla_isr_mensual: List[TramoPorcentaje]
 
+    # Columnas de la tabla mensual (SoA) para localizar el tramo por búsqueda binaria
+    limites_inferiores: Tuple[float, ...] = field(init=False, repr=False)
+    limites_superiores: Tuple[float, ...] = field(init=False, repr=False)
+    cuotas_fijas: Tuple[float, ...] = field(init=False, repr=False)
+    porcentajes_excedentes: Tuple[float, ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        tramos = self.tabla_isr_mensual
+        columnas = {
+            "limites_inferiores": tuple(t.limite_inferior for t in tramos),
+            "limites_superiores": tuple(t.limite_superior for t in tramos),
+            "cuotas_fijas": tuple(t.cuota_fija for t in tramos),
+            "porcentajes_excedentes": tuple(t.porcentaje_excedente for t in tramos),
+        }
+        for nombre, valores in columnas.items():
+            object.__setattr__(self, nombre, valores)
+
 
 # =====================================================
 # EJERCICIO FISCAL 2024
@@ -142,10 +207,16 @@ ISR_2025 = TablaISR(
 # DICCIONARIO PARA ACCESO POR AÑO
 # =====================================================
 
-TABLAS_ISR: Dict[int, TablaISR] = {
-    2024: ISR_2024,
-    2025: ISR_2025,
-}
+# Vista de solo lectura: las tablas se comparten entre todas las peticiones
+TABLAS_ISR: Mapping[int, TablaISR] = MappingProxyType(
+    {
+        2024: ISR_2024,
+        2025: ISR_2025,
+    }
+)
+
+# Ejercicio usado cuando se solicita un año sin tabla; se calcula una sola vez
+EJERCICIO_MAS_RECIENTE: int = max(TABLAS_ISR)
 
 
 def get_tabla_isr(ejercicio: int) -> TablaISR:
@@ -161,9 +232,9 @@ def get_tabla_isr(ejercicio: int) -> TablaISR:
     Raises:
         KeyError: Si no existe la tabla para el ejercicio solicitado
     """
-    if ejercicio not in TABLAS_ISR:
+    tabla = TABLAS_ISR.get(ejercicio)
+    if tabla is None:
         # Si no existe el año solicitado, usar el más reciente disponible
-        ejercicio_disponible = max(TABLAS_ISR.keys())
-        return TABLAS_ISR[ejercicio_disponible]
+        return TABLAS_ISR[EJERCICIO_MAS_RECIENTE]
 
-    return TABLAS_ISR[ejercicio]
+    return tabla